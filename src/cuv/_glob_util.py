@@ -0,0 +1,115 @@
+"""
+Source pattern expansion helpers.
+"""
+
+import fnmatch
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+_WILDCARD_CHARS = frozenset("*?[")
+
+
+def _has_wildcard(part: str) -> bool:
+    return not _WILDCARD_CHARS.isdisjoint(part)
+
+
+def fast_glob(root: Path, pattern: str) -> List[Path]:
+    """
+    Expand a source pattern relative to root, like list(root.glob(pattern)).
+
+    Shallow patterns such as ``src/*.cpp``, where only the last component has
+    wildcards, are matched with a single os.scandir of the directory instead of
+    pathlib's selector machinery. That yields the same entries (files and
+    directories) in the same scandir order as Path.glob. Everything else,
+    including ``**`` patterns, goes through Path.glob itself, so the order of
+    sources (and with it the link order) is exactly what Path.glob gives.
+    """
+    if os.sep != "/":
+        pattern = pattern.replace(os.sep, "/")
+    subdir, _, name_glob = pattern.rpartition("/")
+    if (
+        "**" in pattern
+        or os.path.isabs(pattern)
+        or not _has_wildcard(name_glob)
+        or _has_wildcard(subdir)
+    ):
+        return list(root.glob(pattern))
+
+    base = root / subdir if subdir else root
+    try:
+        with os.scandir(base) as it:
+            names = [entry.name for entry in it]
+    except OSError:
+        return []
+    return [base / name for name in names if fnmatch.fnmatch(name, name_glob)]
+
+
+def _existing_dir(path: Path) -> Path:
+    """Return path, or its nearest existing ancestor if it does not exist."""
+    while not path.is_dir() and path.parent != path:
+        path = path.parent
+    return path
+
+
+def pattern_dirs(root: Path, pattern: str) -> List[Path]:
+    """
+    Return the directories whose listing decides what fast_glob(root, pattern) matches.
+
+    A source added to or removed from one of them changes its mtime, so these are
+    the directories to stat when checking whether a pattern's matches may have
+    changed. Shallow patterns scan one directory; ``**`` patterns and patterns
+    with wildcards in directory components scan every directory below their
+    wildcard-free prefix. A directory that does not exist yet is represented by
+    its nearest existing ancestor.
+    """
+    if os.sep != "/":
+        pattern = pattern.replace(os.sep, "/")
+    subdir, _, _ = pattern.rpartition("/")
+    fixed: List[str] = []
+    recursive = False
+    for part in subdir.split("/") if subdir else ():
+        if part == "**" or _has_wildcard(part):
+            recursive = True
+            break
+        fixed.append(part)
+
+    base = root / "/".join(fixed) if fixed else root
+    if not base.is_dir():
+        return [_existing_dir(base)]
+    if not recursive:
+        return [base]
+    return [Path(dirpath) for dirpath, _, _ in os.walk(base)]
+
+
+def cached_glob(root: Path, pattern: str, glob_cache: Dict[str, List[Path]]) -> List[Path]:
+    """fast_glob(root, pattern), reusing (and filling) glob_cache."""
+    files = glob_cache.get(pattern)
+    if files is None:
+        files = glob_cache[pattern] = fast_glob(root, pattern)
+    return files
+
+
+# globbing is I/O bound, so allow more threads than cores
+_GLOB_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+
+
+def prefetch_globs(
+    project_root: Path,
+    targets: Dict[str, Dict[str, Any]],
+    glob_cache: Dict[str, List[Path]],
+) -> None:
+    """Glob the targets' source patterns missing from glob_cache concurrently."""
+    pending = list(dict.fromkeys(
+        source_pattern
+        for target in targets.values()
+        for source_pattern in target.get("sources", [])
+        if source_pattern not in glob_cache
+    ))
+    if len(pending) <= 1:
+        # not worth a thread pool; cached_glob will glob lazily
+        return
+    with ThreadPoolExecutor(max_workers=min(_GLOB_WORKERS, len(pending))) as executor:
+        glob_results = executor.map(lambda p: fast_glob(project_root, p), pending)
+        glob_cache.update(zip(pending, glob_results))
@@ -1,11 +1,9 @@
 import argparse
-from cuv.toml_parser import load_project
-from cuv.new_project import create_new_project
-from cuv.dep_resolver import resolve_dependencies
-from cuv.ninja_writer import generate_build_file
-from pathlib import Path
-import subprocess
-def main():
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the cuv argument parser once; it is reused across main() calls."""
     parser = argparse.ArgumentParser()
     sub = parser.add_subparsers(dest="command", help="subcommands", required=True)
 
@@ -74,9 +72,14 @@ def main():
         help="Force clean without confirmation"
     )
 
-    args = parser.parse_args()
+    return parser
+
+def main():
+    args = _build_parser().parse_args()
 
     if args.command == "new":
+        from pathlib import Path
+        from cuv.new_project import create_new_project
         project_name = args.project_name
         project_dir = Path(args.directory) / project_name
         create_new_project(
@@ -86,34 +89,50 @@ def main():
             compiler=args.compiler
         )
     elif args.command == "sync":
+        from cuv.toml_parser import load_project
+        # no build dir is involved here, so don't leave a config cache behind
         project = load_project(args.config)
         if args.force:
             print("Force re-syncing dependencies...")
         # resolve_external_dependencies(project)
 
     elif args.command == "build":
-        project = load_project(args.config)
+        import shutil
+        from pathlib import Path
+        from ninja import _program as ninja_program
+        from cuv.toml_parser import load_project_cached
+        from cuv.ninja_writer import build_file_up_to_date, generate_build_file
         build_dir = Path(args.build_dir)
+        # clean before loading, so the fresh config cache isn't wiped right away
         if args.clean:
             print(f"Cleaning build directory: {build_dir}")
-            subprocess.run(["rm", "-rf", str(build_dir)])
+            shutil.rmtree(build_dir, ignore_errors=True)
+        project = load_project_cached(args.config, build_dir)
         build_dir.mkdir(exist_ok=True)
-        print(f"Generated build.ninja in {build_dir}")
-        generate_build_file(project, str(build_dir), str(build_dir / "build.ninja"))
-        subprocess.run(["ninja", "-C", str(build_dir)])
+        build_file = build_dir / "build.ninja"
+        if build_file_up_to_date(project, args.config, build_file):
+            print(f"build.ninja in {build_dir} is up to date")
+        else:
+            print(f"Generated build.ninja in {build_dir}")
+            generate_build_file(project, str(build_dir), str(build_file))
+        returncode = ninja_program("ninja", ["-C", str(build_dir)])
+        if returncode != 0:
+            raise SystemExit(returncode)
 
     elif args.command == "clean":
+        import shutil
+        from pathlib import Path
         build_dir = Path(args.build_dir)
         if build_dir.exists():
             if args.force:
                 print(f"Cleaning build directory: {build_dir}")
-                subprocess.run(["rm", "-rf", str(build_dir)])
+                shutil.rmtree(build_dir, ignore_errors=True)
                 print(f"Build directory {build_dir} has been cleaned.")
             else:
                 confirm = input(f"Are you sure you want to clean {build_dir}? (y/N): ")
                 if confirm.lower() == 'y':
                     print(f"Cleaning build directory: {build_dir}")
-                    subprocess.run(["rm", "-rf", str(build_dir)])
+                    shutil.rmtree(build_dir, ignore_errors=True)
                     print(f"Build directory {build_dir} has been cleaned.")
                 else:
                     print("Clean operation cancelled.")
@@ -1,15 +1,41 @@
 import os
 
+CMAKE_SOURCE_SUFFIXES = (".ixx", ".cpp")
+
+def iter_source_files(src_dir):
+    """
+    Yield paths of module/source files under src_dir, files before subdirectories.
+
+    Behaves like os.walk: a missing or unreadable directory is skipped, and
+    symlinks to directories are neither listed nor followed.
+    """
+    subdirs = []
+    try:
+        with os.scandir(src_dir) as it:
+            entries = list(it)
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            if not entry.is_symlink():
+                subdirs.append(entry.path)
+        elif entry.name.endswith(CMAKE_SOURCE_SUFFIXES):
+            yield entry.path
+    for subdir in subdirs:
+        yield from iter_source_files(subdir)
+
 def generate_cmake(project):
     src_dir = project["build"]["module_root"]
+    paths = list(iter_source_files(src_dir))
     with open("build/CMakeLists.txt", "w") as f:
         f.write(f"cmake_minimum_required(VERSION 3.29)\n")
         f.write(f"project({project['project']['name']} LANGUAGES CXX)\n")
         f.write(f"set(CMAKE_CXX_STANDARD 20)\n\n")
 
         f.write("add_executable(main\n")
-        for root, dirs, files in os.walk(src_dir):
-            for file in files:
-                if file.endswith(".ixx") or file.endswith(".cpp"):
-                    f.write(f"  {os.path.join(root, file)}\n")
+        f.write("".join(f"  {p}\n" for p in paths))
         f.write(")\n")
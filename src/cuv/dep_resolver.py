@@ -3,42 +3,16 @@ import subprocess
 from typing import Dict, Any, Union, List, Set
 import json
 from pathlib import Path
+from array import array
 from collections import defaultdict, deque
 
 std_modules = {
     "iostream","std"
 }
 
-class Node:
-    def __init__(self, name: str, prefix=""):
-        self.name = name
-        self.hashable_name = prefix + name
-    def __hash__(self):
-        return hash(self.hashable_name)
-    def __eq__(self, other):
-        return self.hashable_name == other.hashable_name
-    def __ne__(self, other):
-        return self.hashable_name != other.hashable_name
-    def __lt__(self, other):
-        return self.hashable_name < other.hashable_name
-    def __le__(self, other):
-        return self.hashable_name <= other.hashable_name
-    def __gt__(self, other):
-        return self.hashable_name > other.hashable_name
-    def __ge__(self, other):
-        return self.hashable_name >= other.hashable_name
-    def __str__(self):
-        return self.name
-    def __repr__(self):
-        return self.name
-
-class FileNode(Node):
-    def __init__(self, name: str):
-        super().__init__(name, "file:")
-
-class ModuleNode(Node):
-    def __init__(self, name: str):
-        super().__init__(name, "module:")
+# 圖節點以 (kind, name) tuple 表示，kind 為 FILE 或 MODULE
+FILE = "file"
+MODULE = "module"
 
 def resolve_dependencies(json_deps: Dict[str, Any], external_modules: Set[str] = None):
 
@@ -47,93 +21,82 @@ def resolve_dependencies(json_deps: Dict[str, Any], external_modules: Set[str] =
     else:
         external_modules = set(external_modules).union(std_modules)
 
-    graph = defaultdict(set)          # 正向圖：A -> B 意味著 A 依賴 B
-    reverse_graph = defaultdict(set)  # 反向圖：B -> A 意味著 B 被誰依賴
-    # 第一步：模組名稱 → 提供者檔案（即 module node → file node）
-    for rule in json_deps["rules"]:
-        output_file = rule["primary-output"]
-        file_node = FileNode(output_file)
-        for p in rule.get("provides", []):
-            module_name = p["logical-name"]
-            mod_node = ModuleNode(module_name)
-            if file_node not in graph:
-                graph[file_node] = set()
-                
-            graph[mod_node].add(file_node)
-            reverse_graph[file_node].add(mod_node)
-
-    # 第二步：檔案 → 所需模組名稱（即 file node → module node）
+    # 鄰接表以 dict 充當有序集合：set 的走訪順序隨 hash seed 變動，
+    # dict 保留插入順序，輸出只取決於 deps.json，每次執行都相同
+    graph = defaultdict(dict)          # 正向圖：A -> B 意味著 A 依賴 B
+    reverse_graph = defaultdict(dict)  # 反向圖：B -> A 意味著 B 被誰依賴
+    module_providers = defaultdict(dict)  # module node → 提供該模組的 file nodes
+    file_requires = []                   # (file node, 所需模組名稱)
+
+    # 單次掃描 rules：記錄每個模組的提供者，以及每個檔案所需的模組
     for rule in json_deps["rules"]:
-        source_file = rule["primary-output"]
-        file_node = FileNode(source_file)
-        for r in rule.get("requires", []):
-            module_name = r["logical-name"]
-            if module_name in std_modules:
-                mod_node = ModuleNode(module_name)
-                graph[mod_node] = set()
-            elif module_name in external_modules:
-                mod_node = ModuleNode(module_name)
-                graph[mod_node] = set()
-            else:
-                mod_node = ModuleNode(module_name)
-
-            graph[file_node].add(mod_node)
-            reverse_graph[mod_node].add(file_node)
-
-    # 第三步: 移除 module node，將其依賴轉移給所有依賴它的 file node
-    module_nodes = [n for n in graph if isinstance(n, ModuleNode)]
-
-    for mod_node in module_nodes:
-        # 這個 module node 被哪些 file node 依賴（A → mod_node）
-        file_users = reverse_graph[mod_node]
-        
-        # module node 依賴哪些 file（mod_node → B）
-        file_providers = graph[mod_node]
-
-        # 將所有 file_users 改成直接依賴 file_providers
-        for user in file_users:
-            for provider in file_providers:
-                graph[user].add(provider)
-                reverse_graph[provider].add(user)
-
-            # 移除原本指向 module 的邊
-            graph[user].discard(mod_node)
-
-        # 刪除 module node 自身的邊
-        for provider in file_providers:
-            reverse_graph[provider].discard(mod_node)
-
-        del graph[mod_node]
-        del reverse_graph[mod_node]
-
-
-
-    in_degree = defaultdict(int)
-    for node, deps in graph.items():
-        in_degree[node] += len(deps)
-
-    # topological sort
-    queue = deque([node for node in in_degree if in_degree[node] == 0])
+        file_node = (FILE, rule["primary-output"])
+        provides = rule.get("provides", ())
+        requires = rule.get("requires", ())
+
+        if provides or requires:
+            graph.setdefault(file_node, {})
+
+        for p in provides:
+            module_providers[(MODULE, p["logical-name"])][file_node] = None
+
+        if requires:
+            file_requires.append((file_node, [r["logical-name"] for r in requires]))
+
+    # 檔案直接依賴所需模組的提供者檔案，圖中不建立 module node
+    for file_node, module_names in file_requires:
+        file_deps = graph[file_node]
+        for module_name in module_names:
+            if module_name in external_modules:
+                # 外部模組（含標準模組）沒有本地提供者
+                continue
+
+            providers = module_providers.get((MODULE, module_name))
+            if not providers:
+                raise RuntimeError(
+                    f"Module '{module_name}' required by {file_node[1]} is not provided by any source"
+                )
+
+            file_deps.update(providers)
+            for provider in providers:
+                reverse_graph[provider][file_node] = None
+
+    # 建圖完成後鄰接表只讀不寫，轉成 tuple 以便快速走訪
+    graph = {node: tuple(deps) for node, deps in graph.items()}
+
+    # 將節點編號為連續整數，拓撲排序只在整數陣列上操作
+    nodes = list(graph)
+    id_of = {node: i for i, node in enumerate(nodes)}
+    adj_rev = [tuple(id_of[user] for user in reverse_graph.get(node, ())) for node in nodes]
+    in_deg = array("i", [len(graph[node]) for node in nodes])
+
+    # topological sort (Kahn)
+    queue = deque([i for i in range(len(nodes)) if in_deg[i] == 0])
     topo_order = []
 
+    # 熱迴圈內只使用區域變數
+    popleft = queue.popleft
+    q_append = queue.append
+    topo_append = topo_order.append
     while queue:
-        node = queue.popleft()
-        topo_order.append(node)
+        node = popleft()
+        topo_append(node)
 
-        for neighbor in reverse_graph[node]:
-            in_degree[neighbor] -= 1
-            if in_degree[neighbor] == 0:
-                queue.append(neighbor)
+        for nb in adj_rev[node]:
+            v = in_deg[nb] - 1
+            in_deg[nb] = v
+            if v == 0:
+                q_append(nb)
 
-    if len(topo_order) != len(in_degree):
+    if len(topo_order) != len(nodes):
         raise RuntimeError("Detected cycle in module dependency graph!")
 
     # generate task list
     task_list = []
-    for node in topo_order:
-        deps = graph[node]
-        deps = [d.name for d in deps]
-        task_list.append((node.name, deps))
+    for i in topo_order:
+        node = nodes[i]
+        deps = [d[1] for d in graph[node]]
+        task_list.append((node[1], deps))
     return task_list
 
 
@@ -1,11 +1,49 @@
+from __future__ import annotations
+
 import os
 from pathlib import Path
-from typing import List, Dict, Any, TextIO, Union
-from cuv.toml_parser import ProjectConfig
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Iterator, Optional, Set, TextIO, Tuple, Union
+from cuv._glob_util import cached_glob, prefetch_globs
 from dataclasses import dataclass
+from functools import cached_property
+import hashlib
 import json
+import shlex
+
+if TYPE_CHECKING:
+    from cuv.toml_parser import ProjectConfig
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:  # optional, falls back to the stdlib encoder
+    def _dumps(obj: Any) -> bytes:
+        # compact separators keep the stdlib encoder on its fast C path
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+# source file suffix -> source kind
+_SUFFIX_MAP: Dict[str, str] = {
+    ".cpp": "cpp",
+    ".cc": "cpp",
+    ".ixx": "ixx",
+    ".cppm": "cppm",
+}
+
+def _write_if_changed(path: Path, content: str) -> None:
+    """Write content to path unless the file already holds exactly that content."""
+    try:
+        if path.read_text() == content:
+            return
+    except OSError:
+        pass
+    path.write_text(content)
 
-@dataclass
+def _dir_prefix(path: Path) -> str:
+    """Return path as a string that file names can be appended to directly."""
+    path_str = str(path)
+    return "" if path_str == "." else os.path.join(path_str, "")
+
+@dataclass(slots=True)
 class BuildFlags:
     """Data class for build flags."""
     cxx: str
@@ -23,6 +61,7 @@ class CompileCommandsWriter:
         objects_dir: Union[str, Path],
         targets_dir: Union[str, Path],
         module_cache_dir: Union[str, Path],
+        glob_cache: Optional[Dict[str, List[Path]]] = None,
     ):
         """
         Initialize CompileCommandsWriter with project configuration and build directory.
@@ -33,6 +72,7 @@ class CompileCommandsWriter:
             objects_dir: Absolute path to objects directory
             targets_dir: Absolute path to targets directory
             module_cache_dir: Absolute path to module cache directory
+            glob_cache: Optional pattern -> files cache shared with another writer
         """
         self.config = project_config
         self.project_root = Path(project_config.project_root)
@@ -40,10 +80,43 @@ class CompileCommandsWriter:
         self.objects_dir = Path(objects_dir)
         self.targets_dir = Path(targets_dir)
         self.module_cache_dir = Path(module_cache_dir)
+        self._glob_cache: Dict[str, List[Path]] = {} if glob_cache is None else glob_cache
+        # string forms used when formatting commands, computed once
+        self._project_root_str = str(self.project_root)
+        self._objects_prefix = _dir_prefix(self.objects_dir)
+        self._module_cache_prefix = _dir_prefix(self.module_cache_dir)
 
+    def input_stamp(self) -> str:
+        """
+        Hash everything the compile commands are generated from.
 
-    def get_build_flags(self) -> BuildFlags:
-        """Get build flags from project config."""
+        Covers the project file contents, the compile flags written to the
+        response files, the response file directory and the path of every source
+        matched by the targets. Entries do not depend on source contents, so
+        editing a source leaves the stamp (and compile_commands.json) alone; only
+        adding, removing or renaming sources, or changing the project file,
+        invalidates it.
+        """
+        key = hashlib.blake2b()
+        if self.config.config_path is not None:
+            key.update(Path(self.config.config_path).read_bytes())
+        flags = self.build_flags
+        key.update(f"\0{flags.cxxflags}\0{flags.include_path}\0{flags.system_include_path}".encode())
+        key.update(f"\0{self._rsp_dir}\0".encode())
+        prefetch_globs(self.project_root, self.config.targets, self._glob_cache)
+        sources = sorted({
+            source_file
+            for target in self.config.targets.values()
+            for source_pattern in target.get("sources", [])
+            for source_file in cached_glob(self.project_root, source_pattern, self._glob_cache)
+        })
+        for source_file in sources:
+            key.update(f"{source_file}\n".encode())
+        return key.hexdigest()
+
+    @cached_property
+    def build_flags(self) -> BuildFlags:
+        """Build flags from project config, computed once per writer."""
         return BuildFlags(
             cxx=self.config.cxx_compiler,
             ar=self.config.ar,
@@ -53,77 +126,165 @@ class CompileCommandsWriter:
             system_include_path="",
         )
 
-    def get_source_type(self, source_file: Path) -> str:
-        """Determine source file type."""
-        if source_file.suffix == ".cpp":
-            return "cpp"
-        elif source_file.suffix == ".ixx":
-            return "ixx"
-        elif source_file.suffix == ".cppm":
-            return "cppm"
-        return "unknown"
-
-
-
-    def gen_build_commands(self):
-        """Write build statements for object files."""
-        flags = self.get_build_flags()
-
-        command_dict: Dict[str, Dict[str, str]] = {}
-        for target_name, target in self.config.targets.items():
-            sources = target.get("sources", [])
-            all_object_files = []
-            for source_pattern in sources:
-                for source_file in Path(self.project_root).glob(source_pattern):
-                    source_type = self.get_source_type(source_file)
-                    if source_type in ["ixx", "cppm"]:
-                        out_file = self.module_cache_dir / (source_file.stem + ".pcm")
-                        command = f"{flags.cxx} {source_file} -o {out_file} {flags.cxxflags} --precompile"
-                        if flags.include_path:
-                            command += f" -I{flags.include_path}"
-                        if flags.system_include_path:
-                            command += f" -isystem {flags.system_include_path}"
-                        
-                    elif source_type in ["cpp", "cc"]:
-                        out_file = self.objects_dir / (source_file.stem + ".o")
-                        command = f"{flags.cxx} {source_file} -o {out_file} {flags.cxxflags}"
-                        if flags.include_path:
-                            command += f" -I{flags.include_path}"
-                        if flags.system_include_path:
-                            command += f" -isystem {flags.system_include_path}"
-                        all_object_files.append(str(out_file))
-
-                    key = str(out_file)
+    def get_source_type(self, suffix: str) -> str:
+        """Determine source file type from its suffix (e.g. ".cpp")."""
+        return _SUFFIX_MAP.get(suffix, "unknown")
+
+
+
+    def gen_build_commands(self) -> List[Dict[str, str]]:
+        """Collect compile commands for all sources into a list."""
+        return list(self.iter_build_commands())
+
+    def iter_build_commands(self) -> Iterator[Dict[str, str]]:
+        """Yield one compile command entry per unique output file."""
+        for entry, _ in self._iter_entries():
+            yield entry
+
+    def write_outputs(self, output_path: Union[str, Path]) -> None:
+        """
+        Write compile_commands.json to output_path along with its response files.
+
+        Every entry's command reads its arguments from ``<build_dir>/rsp/<output>.rsp``.
+        Those files are refreshed here (rewritten only when their content changed)
+        and ``.rsp`` files no longer belonging to any output are removed.
+        """
+        rsp_dir = self._rsp_dir
+        rsp_dir.mkdir(parents=True, exist_ok=True)
+        rsp_names: Set[str] = set()
+
+        def entries() -> Iterator[Dict[str, str]]:
+            for entry, rsp_content in self._iter_entries():
+                rsp_name = f"{os.path.basename(entry['output'])}.rsp"
+                rsp_names.add(rsp_name)
+                _write_if_changed(rsp_dir / rsp_name, rsp_content)
+                yield entry
+
+        write_compile_commands(entries(), output_path)
+
+        with os.scandir(rsp_dir) as it:
+            stale = [e.path for e in it if e.name.endswith(".rsp") and e.name not in rsp_names]
+        for rsp_path in stale:
+            os.unlink(rsp_path)
+
+    @property
+    def _rsp_dir(self) -> Path:
+        return Path(os.path.abspath(self.build_dir)) / "rsp"
+
+    def _iter_entries(self) -> Iterator[Tuple[Dict[str, str], str]]:
+        """Yield (compile command entry, response file content) per unique output file."""
+        flags = self.build_flags
+
+        # flags are the same for every source, split them once
+        common_args = shlex.split(flags.cxxflags)
+        if flags.include_path:
+            common_args.append(f"-I{flags.include_path}")
+        if flags.system_include_path:
+            common_args += ["-isystem", flags.system_include_path]
+        common_lines = "".join(f"{shlex.quote(arg)}\n" for arg in common_args)
+
+        rsp_dir = self._rsp_dir
+
+        seen: Set[str] = set()
+        project_root = self.project_root
+        glob_cache = self._glob_cache
+        root_str = self._project_root_str
+        # globbed paths start with the root, so the relative path is a plain slice
+        root_prefix = root_str.rstrip(os.sep) + os.sep
+        objects_prefix = self._objects_prefix
+        module_cache_prefix = self._module_cache_prefix
+
+        prefetch_globs(project_root, self.config.targets, self._glob_cache)
+
+        for target in self.config.targets.values():
+            for source_pattern in target.get("sources", []):
+                for source_file in cached_glob(project_root, source_pattern, glob_cache):
+                    # stem and suffix from one splitext on the string, no Path properties
+                    source_str = str(source_file)
+                    stem, suffix = os.path.splitext(os.path.basename(source_str))
+                    source_type = self.get_source_type(suffix)
+                    if source_type in ("ixx", "cppm"):
+                        out_file = f"{module_cache_prefix}{stem}.pcm"
+                        extra_lines = "--precompile\n"
+                    elif source_type == "cpp":
+                        out_file = f"{objects_prefix}{stem}.o"
+                        extra_lines = ""
+                    else:
+                        continue
+
                     # make sure unique
-                    if key not in command_dict:
-                        command_dict[key] = {
-                            "directory": str(self.project_root),
-                            "file": str(source_file.relative_to(self.project_root)),
-                            "command": command,
-                            "output": str(out_file),
+                    if out_file in seen:
+                        continue
+                    seen.add(out_file)
+
+                    # per-TU response file, named after the (unique) output file
+                    rsp_path = rsp_dir / f"{os.path.basename(out_file)}.rsp"
+                    command = f"{flags.cxx} @{rsp_path} -o {out_file}"
+                    if source_str.startswith(root_prefix):
+                        rel_file = source_str[len(root_prefix):]
+                    else:
+                        rel_file = str(source_file.relative_to(project_root))
+                    entry = {
+                        "directory": root_str,
+                        "file": rel_file,
+                        "command": command,
+                        "output": out_file,
                     }
-            
-            # add target
-            # if target.get("type") == "executable":
-            #     assert target_name not in command_dict
-            #     command = f"{flags.cxx} {" ".join(all_object_files)} -o {out_file} {flags.cxxflags} -I{self.project_root}/include"
-            #     command_dict[target_name] = {
-            #             "directory": str(self.project_root),
-            #             "file": all_object_files,
-            #             "command": command,
-            #             "output": str(out_file),
-            # }
-            
+                    yield entry, f"{shlex.quote(source_str)}\n{common_lines}{extra_lines}"
+
 
-        return list(command_dict.values())
+def write_compile_commands(commands: Iterable[Dict[str, str]], path: Union[str, Path]):
+    """
+    Stream compile commands to path as a JSON array, one entry per line.
 
+    Entries are encoded one at a time (with orjson when it is installed) into
+    ``<path>.tmp``, which is then moved into place with os.replace, so readers
+    such as clangd never see a half-written file.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with open(tmp_path, "wb", buffering=1 << 20) as f:
+        sep = b"[\n"
+        for command in commands:
+            f.write(sep + _dumps(command))
+            sep = b",\n"
+        f.write(b"\n]\n" if sep == b",\n" else b"[]\n")
+
+    os.replace(tmp_path, path)
+
+
+def update_compile_commands(writer: CompileCommandsWriter, output_path: Union[str, Path]) -> bool:
+    """
+    Regenerate compile_commands.json and its response files if their inputs changed.
+
+    The writer's input_stamp() is compared with the one stored next to the output
+    in ``compile_commands.stamp``; when they match (and the output and rsp/ are
+    still there) nothing is written. Returns whether the files were regenerated.
+    """
+    output_path = Path(output_path)
+    stamp_path = output_path.with_name("compile_commands.stamp")
+    stamp = writer.input_stamp()
+    try:
+        # the entries point at response files, so those have to be there too
+        if (
+            output_path.exists()
+            and writer._rsp_dir.is_dir()
+            and stamp_path.read_text() == stamp
+        ):
+            return False
+    except OSError:
+        pass
+
+    writer.write_outputs(output_path)
+    stamp_path.write_text(stamp)
+    return True
 
 
 def generate_compile_commands(
     project_config: ProjectConfig, build_dir: Union[str, Path]
 ):
 
-    project_root = Path(project_config.project_root)
     build_dir = Path(build_dir)
     objects_dir = (build_dir / "objects").relative_to(build_dir)
     targets_dir = (build_dir / "targets").relative_to(build_dir)
@@ -131,22 +292,20 @@ def generate_compile_commands(
         build_dir
     )
     writer = CompileCommandsWriter(project_config, build_dir, objects_dir, targets_dir, module_cache_dir)
-
-    with open(build_dir / "compile_commands.json", "w") as f:
-        json.dump(writer.gen_build_commands(), f, indent=2)
+    update_compile_commands(writer, build_dir / "compile_commands.json")
 
 
 
 if __name__ == "__main__":
     # Load project config
-    from toml_parser import load_project
+    from cuv.toml_parser import load_project_cached
     from pathlib import Path
 
     project_root = Path(os.path.abspath(__file__)).parent.parent.parent
     config_path = project_root / "tests" / "cuv-test-project" / "cproject.toml"
-    config = load_project(config_path)
+    build_dir = os.path.join(project_root, "tests", "cuv-test-project", "build_test")
+    config = load_project_cached(config_path, build_dir)
 
     # Generate build file
-    build_dir = os.path.join(project_root, "tests", "cuv-test-project", "build_test")
     generate_compile_commands(config, build_dir)
     print(f"Generated compile_commands.json at {build_dir}")
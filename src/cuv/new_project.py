@@ -1,28 +1,18 @@
 import os
 import shutil
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
-def create_project_directory(project_name: str, project_dir: Path) -> None:
-    """Create the basic project directory structure."""
-    # Create main directories
-    (project_dir / "src").mkdir(parents=True, exist_ok=True)
-    (project_dir / "interface").mkdir(parents=True, exist_ok=True)
-    (project_dir / "build").mkdir(parents=True, exist_ok=True)
-    
-    # Create basic source files
-    with open(project_dir / "src" / "main.cpp", "w") as f:
-        f.write("""
+_MAIN_CPP = """
 import hello;
 
 int main() {
     say_hello();
     return 0;
 }
-""")
-    
-    with open(project_dir / "src" / "hello.cpp", "w") as f:
-        f.write("""
+"""
+
+_HELLO_CPP = """
 module;
 #include <iostream>
 module hello;
@@ -30,56 +20,15 @@ module hello;
 void say_hello(){
     std::cout << "Hello from module!" << std::endl;
 }
-""")
+"""
 
-    # Create basic interface file
-    with open(project_dir / "interface" / "hello.cppm", "w") as f:
-        f.write("""
+_HELLO_CPPM = """
 export module hello;
 
 export void say_hello();
-""")
-
-def create_cxxproject_toml(project_name: str, project_dir: Path, 
-                          cxx_standard: str = "20", 
-                          compiler: Optional[str] = None) -> None:
-    """Create the cxxproject.toml configuration file."""
-    if compiler is None:
-        # Try to find system compiler
-        try:
-            compiler = shutil.which("clang++") or shutil.which("g++")
-        except:
-            compiler = ""
-            
-    if compiler:
-        c_compiler = compiler.replace("++", "")
-    else:
-        c_compiler = ""
-    
-    config = f"""[project]
-name = "{project_name}"
-version = "0.1.0"
-
-[project.targets]
-{project_name} = {{ type = "executable", sources = ["src/*.cpp", "interface/*.cppm"] }}
-
-[project.toolchain]
-C_COMPILER = "{c_compiler}"
-CXX_COMPILER = "{compiler}"
-AR = "/usr/bin/ar"
-
-[project.settings]
-cxx_standard = "{cxx_standard}"
-warnings = "all"
-warnings_as_errors = true
 """
-    
-    with open(project_dir / "cxxproject.toml", "w") as f:
-        f.write(config)
 
-def create_gitignore(project_dir: Path) -> None:
-    """Create a basic .gitignore file."""
-    gitignore_content = """
+_GITIGNORE = """
 build/
 *.o
 *.a
@@ -87,12 +36,8 @@ build/
 *.pdb
 .DS_Store
 """
-    with open(project_dir / ".gitignore", "w") as f:
-        f.write(gitignore_content)
 
-def create_license(project_dir: Path) -> None:
-    """Create a default MIT license."""
-    license_content = """MIT License
+_LICENSE = """MIT License
 
 Copyright (c) 2025 Your Name
 
@@ -114,8 +59,69 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
-    with open(project_dir / "LICENSE", "w") as f:
-        f.write(license_content)
+
+_CXXPROJECT_TOML = """[project]
+name = "{project_name}"
+version = "0.1.0"
+
+[project.targets]
+{project_name} = {{ type = "executable", sources = ["src/*.cpp", "interface/*.cppm"] }}
+
+[project.toolchain]
+C_COMPILER = "{c_compiler}"
+CXX_COMPILER = "{compiler}"
+AR = "/usr/bin/ar"
+
+[project.settings]
+cxx_standard = "{cxx_standard}"
+warnings = "all"
+warnings_as_errors = true
+"""
+
+# (path relative to the project directory, content) of every static file in a new project
+_TEMPLATE_FILES: Tuple[Tuple[str, str], ...] = (
+    ("src/main.cpp", _MAIN_CPP),
+    ("src/hello.cpp", _HELLO_CPP),
+    ("interface/hello.cppm", _HELLO_CPPM),
+    (".gitignore", _GITIGNORE),
+    ("LICENSE", _LICENSE),
+)
+
+_TEMPLATE_DIRS = sorted({os.path.dirname(rel) for rel, _ in _TEMPLATE_FILES} | {"build"})
+
+def create_project_directory(project_name: str, project_dir: Path) -> None:
+    """Create the project directory structure and its static files."""
+    for rel_dir in _TEMPLATE_DIRS:
+        (project_dir / rel_dir).mkdir(parents=True, exist_ok=True)
+
+    for rel_path, content in _TEMPLATE_FILES:
+        (project_dir / rel_path).write_text(content)
+
+def create_cxxproject_toml(project_name: str, project_dir: Path, 
+                          cxx_standard: str = "20", 
+                          compiler: Optional[str] = None) -> None:
+    """Create the cxxproject.toml configuration file."""
+    if compiler is None:
+        # Try to find system compiler
+        try:
+            compiler = shutil.which("clang++") or shutil.which("g++")
+        except:
+            compiler = ""
+            
+    if compiler:
+        c_compiler = compiler.replace("++", "")
+    else:
+        c_compiler = ""
+    
+    config = _CXXPROJECT_TOML.format(
+        project_name=project_name,
+        c_compiler=c_compiler,
+        compiler=compiler,
+        cxx_standard=cxx_standard,
+    )
+    
+    with open(project_dir / "cxxproject.toml", "w") as f:
+        f.write(config)
 
 def create_new_project(project_name: str, project_dir: Path, 
                       cxx_standard: str = "20", 
@@ -132,7 +138,5 @@ def create_new_project(project_name: str, project_dir: Path,
     # Create project structure
     create_project_directory(project_name, project_dir)
     create_cxxproject_toml(project_name, project_dir, cxx_standard, compiler)
-    create_gitignore(project_dir)
-    create_license(project_dir)
     
     print(f"Created new project '{project_name}' at {project_dir}")
@@ -2,19 +2,28 @@
 Ninja build file generator for C/C++ projects.
 """
 
+from __future__ import annotations
+
+import hashlib
 import os
 import json
+import pickle
 from pathlib import Path
-from typing import List, Dict, Any, TextIO, Union
-from cuv.toml_parser import ProjectConfig
-from cuv.gen_compile_commands import CompileCommandsWriter
+from typing import TYPE_CHECKING, List, Dict, Any, Set, TextIO, Tuple, Union
+from cuv._glob_util import cached_glob, fast_glob, pattern_dirs, prefetch_globs
+from cuv.gen_compile_commands import CompileCommandsWriter, update_compile_commands
 from cuv.dep_resolver import resolve_dependencies
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from enum import Enum, auto
+import shutil
 import subprocess
 
+if TYPE_CHECKING:
+    from cuv.toml_parser import ProjectConfig
+
 
-@dataclass
+@dataclass(slots=True)
 class BuildFlags:
     """Data class for build flags."""
 
@@ -22,9 +31,16 @@ class BuildFlags:
     ar: str
     cxxflags: str
     ldflags: str
+    ccache: str = ""
+
+
+@lru_cache(maxsize=1)
+def _find_ccache() -> str:
+    """Locate ccache on PATH once per process ("" when it is not installed)."""
+    return shutil.which("ccache") or ""
 
 
-@dataclass
+@dataclass(slots=True)
 class NinjaTask:
     """Data class for ninja task."""
 
@@ -34,7 +50,16 @@ class NinjaTask:
     rule: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class CompiledTarget:
+    """A project target with its type and source patterns read out of the config once."""
+
+    name: str
+    type: str
+    sources: Tuple[str, ...]
+
+
+@dataclass(slots=True)
 class NinjaRule:
     """Data class for ninja rule."""
 
@@ -43,6 +68,47 @@ class NinjaRule:
     description: str
 
 
+# compile rules, identical for every project
+_NINJA_RULES: Tuple[NinjaRule, ...] = (
+    NinjaRule(
+        name="cxx_compile",
+        command="$ccache $cxx $cxxflags -c $in -o $out -fprebuilt-module-path=$module_cache_dir",
+        description="Compiling source $in",
+    ),
+    NinjaRule(
+        name="cxx_module_compile",
+        command="$ccache $cxx $cxxflags --precompile -o $out -c $in",
+        description="Compiling module interface $in",
+    ),
+    NinjaRule(
+        name="cxx_static_library",
+        command="$ar rcs $out $in",
+        description="Linking $out",
+    ),
+    NinjaRule(
+        name="cxx_link",
+        command="$cxx $in -o $out $ldflags",
+        description="Linking $out",
+    ),
+)
+
+# rendered once at import
+_RULES_TEXT = "# ====build rules====\n\n" + "".join(
+    f"rule {rule.name}\n  command = {rule.command}\n  description = {rule.description}\n\n"
+    for rule in _NINJA_RULES
+)
+
+# bump whenever the generated build statements change shape
+_BUILD_FILE_FORMAT = 1
+
+# first line of every build.ninja; build_file_up_to_date() rejects files written
+# by another generator version or with other rules
+_GENERATOR_HEADER = "# generated by cuv, format {}, rules {}\n".format(
+    _BUILD_FILE_FORMAT, hashlib.blake2b(_RULES_TEXT.encode(), digest_size=8).hexdigest()
+)
+
+
+
 class SourceType(Enum):
     CppSource = auto()
     CppModule = auto()
@@ -51,7 +117,28 @@ class SourceType(Enum):
     Unknown = auto()
 
 
+# topologically sorted task list, pickled behind a digest of deps.json
+TASK_ORDER_CACHE_FILE = ".task_order.pkl"
+
+def _append_build(parts: List[str], task: NinjaTask) -> None:
+    """Append the pieces of a task's ninja build statement to parts."""
+    parts += ("build ", task.output, ": ", task.rule)
+    if task.input:
+        parts += (" ", " ".join(task.input))
+    if task.deps:
+        parts += (" | ", " ".join(task.deps))
+    parts.append("\n")
+
+
 class NinjaWriter:
+    # source file suffix -> source type
+    _SUFFIX_MAP: Dict[str, SourceType] = {
+        ".cpp": SourceType.CppSource,
+        ".cc": SourceType.CppSource,
+        ".ixx": SourceType.CppModule,
+        ".cppm": SourceType.CppModule,
+    }
+
     def __init__(self, project_config: ProjectConfig, build_dir: Union[str, Path]):
         """
         Initialize NinjaWriter with project configuration and build directory.
@@ -66,180 +153,261 @@ class NinjaWriter:
         self.objects_dir = self.build_dir / "objects"
         self.targets_dir = self.build_dir / "targets"
         self.module_cache_dir = self.build_dir / "module_cache"
+        # build_dir-relative output dirs, computed once; the prefixes make
+        # per-source paths plain string formatting
+        self._objects_rel = str(self.objects_dir.relative_to(self.build_dir))
+        self._targets_rel = str(self.targets_dir.relative_to(self.build_dir))
+        self._module_cache_rel = str(self.module_cache_dir.relative_to(self.build_dir))
+        self._objects_prefix = self._objects_rel + os.sep
+        self._targets_prefix = self._targets_rel + os.sep
+        self._module_cache_prefix = self._module_cache_rel + os.sep
+        self._glob_cache: Dict[str, List[Path]] = {}
+        self.targets: Tuple[CompiledTarget, ...] = tuple(
+            CompiledTarget(name, target.get("type", ""), tuple(target.get("sources", ())))
+            for name, target in project_config.targets.items()
+        )
 
-    def write_build_vars(self, f: TextIO):
-        """Write build variables."""
-
-        flags = BuildFlags(
+    @cached_property
+    def build_flags(self) -> BuildFlags:
+        """Build flags from project config, computed once per writer."""
+        return BuildFlags(
             cxx=self.config.cxx_compiler,
             ar=self.config.ar,
             cxxflags="-std=c++20 -Wall -O2",
             ldflags="",
+            ccache=_find_ccache() if self.config.use_ccache else "",
         )
-        
-        module_cache_dir = self.module_cache_dir.relative_to(self.build_dir)
-        f.write("# === build variables ===\n")
-        f.write(f"cxx = {flags.cxx}\n")
-        f.write(f"ar = {flags.ar}\n")
-        f.write(f"module_cache_dir = {module_cache_dir}\n")
-        f.write(
-            f"cxxflags = {flags.cxxflags} -fprebuilt-module-path=$module_cache_dir\n"
-        )
+
+    def _render_build_vars(self) -> str:
+        """Render build variables."""
+
+        flags = self.build_flags
+        parts: List[str] = [
+            "# === build variables ===\n",
+            # compile rules run through $ccache; leave it empty to call $cxx directly
+            f"ccache = {flags.ccache}\n",
+            f"cxx = {flags.cxx}\n",
+            f"ar = {flags.ar}\n",
+            f"module_cache_dir = {self._module_cache_rel}\n",
+            f"cxxflags = {flags.cxxflags} -fprebuilt-module-path=$module_cache_dir\n",
+        ]
         if len(flags.ldflags) > 0:
-            f.write(f"ldflags = {flags.ldflags}\n")
-        f.write("\n")
-
-    def get_source_type(self, source_file: Path) -> SourceType:
-        """Determine source file type."""
-        if source_file.suffix in [".cpp", ".cc"]:
-            return SourceType.CppSource
-        elif source_file.suffix in [".ixx", ".cppm"]:
-            return SourceType.CppModule
-        return SourceType.Unknown
-
-    def write_rules(self, f):
+            parts.append(f"ldflags = {flags.ldflags}\n")
+        parts.append("\n")
+        return "".join(parts)
+
+    def write_build_vars(self, f: TextIO):
+        """Write build variables."""
+        f.write(self._render_build_vars())
+
+    def get_source_type(self, suffix: str) -> SourceType:
+        """Determine source file type from its suffix (e.g. ".cpp")."""
+        return self._SUFFIX_MAP.get(suffix, SourceType.Unknown)
+
+    def write_rules(self, f: TextIO):
         """Write compile rules for different source types."""
+        f.write(_RULES_TEXT)
 
-        f.write("# ====build rules====\n\n")
-        rules = [
-            NinjaRule(
-                name="cxx_compile",
-                command="$cxx $cxxflags -c $in -o $out -fprebuilt-module-path=$module_cache_dir",
-                description="Compiling source $in",
-            ),
-            NinjaRule(
-                name="cxx_module_compile",
-                command="$cxx $cxxflags --precompile -o $out -c $in",
-                description="Compiling module interface $in",
-            ),
-            NinjaRule(
-                name="cxx_static_library",
-                command="$ar rcs $out $in",
-                description="Linking $out",
-            ),
-            NinjaRule(
-                name="cxx_link",
-                command="$cxx $in -o $out $ldflags",
-                description="Linking $out",
-            ),
-        ]
-        for rule in rules:
-            f.write(
-                f"rule {rule.name}\n  command = {rule.command}\n  description = {rule.description}\n"
-            )
-            f.write("\n")
+    def _scan_deps_key(self, compile_commands_path: Path, cxxflags: str) -> str:
+        """
+        Hash what clang-scan-deps output depends on.
+
+        That is the compilation database, the flags in the per-TU response files
+        and the path, mtime and size of every source it scans.
+        """
+        key = hashlib.blake2b(compile_commands_path.read_bytes(), digest_size=16)
+        key.update(cxxflags.encode())
+        sources = sorted({
+            src_file
+            for target in self.targets
+            for source_pattern in target.sources
+            for src_file in cached_glob(self.project_root, source_pattern, self._glob_cache)
+        })
+        for src_file in sources:
+            st = src_file.stat()
+            key.update(f"\n{src_file}\0{st.st_mtime_ns}\0{st.st_size}".encode())
+        return key.hexdigest()
 
     def gen_task_deps_list(self):
 
-        objects_dir = self.objects_dir.relative_to(self.build_dir)
-        targets_dir = self.targets_dir.relative_to(self.build_dir)
-        module_cache_dir = self.module_cache_dir.relative_to(self.build_dir)
         writer = CompileCommandsWriter(
             self.config,
             self.build_dir,
-            objects_dir,
-            targets_dir,
-            module_cache_dir,
+            self._objects_rel,
+            self._targets_rel,
+            self._module_cache_rel,
+            glob_cache=self._glob_cache,
         )
 
         os.makedirs(self.build_dir, exist_ok=True)
 
-        # Write main build file
-        with open(self.build_dir / "compile_commands.json", "w") as f:
-            json.dump(writer.gen_build_commands(), f, indent=2)
-
-        cmd = "clang-scan-deps-19 -compilation-database compile_commands.json -format=p1689 -o deps.json"
-        subprocess.run(cmd.split(" "), cwd=self.build_dir)
-
-        with open(self.build_dir / "deps.json", "r") as f:
-            json_deps = json.load(f)
-        task_list = resolve_dependencies(json_deps)
+        compile_commands_path = self.build_dir / "compile_commands.json"
+        update_compile_commands(writer, compile_commands_path)
+
+        # only rescan when the compilation database or a scanned source changed
+        deps_path = self.build_dir / "deps.json"
+        key_path = self.build_dir / ".deps_cache_key"
+        deps_key = self._scan_deps_key(compile_commands_path, writer.build_flags.cxxflags)
+        try:
+            cached = deps_path.exists() and key_path.read_text() == deps_key
+        except OSError:
+            cached = False
+        if not cached:
+            if key_path.exists():
+                key_path.unlink()
+            subprocess.run(
+                [
+                    "clang-scan-deps-19",
+                    "-compilation-database", "compile_commands.json",
+                    "-format=p1689",
+                    "-j", str(os.cpu_count() or 1),
+                    "-o", "deps.json",
+                ],
+                cwd=self.build_dir,
+                check=True,
+            )
+            key_path.write_text(deps_key)
+
+        # reuse the sorted task list while deps.json is unchanged
+        deps_data = deps_path.read_bytes()
+        digest = hashlib.blake2b(deps_data, digest_size=16).hexdigest().encode()
+        order_path = self.build_dir / TASK_ORDER_CACHE_FILE
+        try:
+            blob = order_path.read_bytes()
+            if blob[:len(digest)] == digest:
+                return pickle.loads(blob[len(digest):])
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            pass
+
+        task_list = resolve_dependencies(json.loads(deps_data))
+        try:
+            order_path.write_bytes(digest + pickle.dumps(task_list, protocol=pickle.HIGHEST_PROTOCOL))
+        except OSError:
+            pass
 
         return task_list
 
-    def write_target_builds(self, f: TextIO):
-        """Write build statements for object files."""
+    @cached_property
+    def _registered_tasks(self) -> Tuple[Dict[str, NinjaTask], List[NinjaTask]]:
+        """Classify every target source once into compile tasks and target link tasks."""
+
+        objects_prefix = self._objects_prefix
+        targets_prefix = self._targets_prefix
+        module_cache_prefix = self._module_cache_prefix
+        get_source_type = self.get_source_type
+        prefetch_globs(self.project_root, self.config.targets, self._glob_cache)
 
-        objects_dir = self.objects_dir.relative_to(self.build_dir)
-        targets_dir = self.targets_dir.relative_to(self.build_dir)
-        module_cache_dir = self.module_cache_dir.relative_to(self.build_dir)
         # register ninja tasks (without deps and topo sort)
         ninja_task_dict: Dict[str, NinjaTask] = {}
-        ninja_target_list: List[str] = []
-        for target_name, target in self.config.targets.items():
-            sources = target.get("sources", [])
+        ninja_target_list: List[NinjaTask] = []
+        for target in self.targets:
             target_obj_files = []
-
-            for source_pattern in sources:
-                for src_file in Path(self.project_root).glob(source_pattern):
-                    src_type = self.get_source_type(src_file)
-                    match src_type:
+            # a file matched by several patterns is compiled and linked once
+            seen: Set[str] = set()
+
+            for source_pattern in target.sources:
+                for src_file in cached_glob(self.project_root, source_pattern, self._glob_cache):
+                    src_str = str(src_file)
+                    if src_str in seen:
+                        continue
+                    seen.add(src_str)
+                    # stem and suffix from one splitext on the string, no Path properties
+                    stem, suffix = os.path.splitext(os.path.basename(src_str))
+                    match get_source_type(suffix):
                         case SourceType.CppModule:
-                            tar_file = str(
-                                module_cache_dir / (src_file.stem + ".pcm")
-                            )
+                            tar_file = f"{module_cache_prefix}{stem}.pcm"
                             ninja_task_dict[tar_file] = NinjaTask(
-                                output=tar_file, input=[str(src_file)], rule="cxx_module_compile", deps=[]
+                                output=tar_file, input=[src_str], rule="cxx_module_compile", deps=[]
                             )
                         case SourceType.CppSource:
-                            tar_file = str(objects_dir / (src_file.stem + ".o"))
+                            tar_file = f"{objects_prefix}{stem}.o"
                             ninja_task_dict[tar_file] = NinjaTask(
-                                output=tar_file, input=[str(src_file)], rule="cxx_compile", deps=[]
+                                output=tar_file, input=[src_str], rule="cxx_compile", deps=[]
                             )
                             target_obj_files.append(tar_file)
 
-            if target.get("type") == "library":
-                tar_file = str(targets_dir / f"lib{target_name}.a")
+            if target.type == "library":
+                tar_file = f"{targets_prefix}lib{target.name}.a"
                 ninja_target_list.append(NinjaTask(
                     output=tar_file, input=target_obj_files, rule="cxx_static_library", deps=[]
                 ))
 
-            elif target.get("type") == "executable":
-                tar_file = str(targets_dir / target_name)
+            elif target.type == "executable":
+                tar_file = f"{targets_prefix}{target.name}"
                 ninja_target_list.append(NinjaTask(
                     output=tar_file, input=target_obj_files, rule="cxx_link", deps=[]
                 ))
 
+        return ninja_task_dict, ninja_target_list
+
+    def _render_target_builds(self) -> str:
+        """Render build statements for object files and targets."""
+        ninja_task_dict, ninja_target_list = self._registered_tasks
+
         # get task_list from deps.json (with topo sort)
         task_list = self.gen_task_deps_list()
 
-        f.write("# ====build tasks====\n\n")
+        parts: List[str] = ["# ====build tasks====\n\n"]
         for task_name, task_deps in task_list:
             ninja_task = ninja_task_dict[task_name]
             ninja_task.deps = task_deps
+            _append_build(parts, ninja_task)
 
-            ninja_cmd = f"build {ninja_task.output}: {ninja_task.rule}"
-            if len(ninja_task.input) > 0:
-                ninja_cmd += " ".join(ninja_task.input)
-            if len(ninja_task.deps) > 0:
-                ninja_cmd += " | " + " ".join(ninja_task.deps)
-            ninja_cmd += "\n"
+        parts.append("# ====build targets====\n\n")
+        for target in ninja_target_list:
+            _append_build(parts, target)
+        parts.append("\n")
+        return "".join(parts)
 
-            f.write(ninja_cmd)
+    def write_target_builds(self, f: TextIO):
+        """Write build statements for object files."""
+        f.write(self._render_target_builds())
 
-        f.write("# ====build targets====\n\n")
+    def _render_footer(self) -> str:
+        """Render ninja build file footer."""
+        _, ninja_target_list = self._registered_tasks
+        parts: List[str] = ["\n# Default target\n"]
         for target in ninja_target_list:
-            ninja_cmd = f"build {target.output}: {target.rule}"
-            if len(target.input) > 0:
-                ninja_cmd += " " + " ".join(target.input)
-            if len(target.deps) > 0:
-                ninja_cmd += " | " + " ".join(target.deps)
-            ninja_cmd += "\n"
-
-            f.write(ninja_cmd)
-        f.write("\n")
+            parts.append(f"default {target.output}\n")
+        return "".join(parts)
 
     def write_footer(self, f: TextIO):
         """Write ninja build file footer."""
-        targets_dir = self.targets_dir.relative_to(self.build_dir)
-        f.write("\n# Default target\n")
-        for target_name, target in self.config.targets.items():
-            if target.get("type") == "library":
-                lib_file = str(targets_dir / f"lib{target_name}.a")
-                f.write(f"default {lib_file}\n")
-            elif target.get("type") == "executable":
-                exe_file = str(targets_dir / target_name)
-                f.write(f"default {exe_file}\n")
+        f.write(self._render_footer())
+
+
+def build_file_up_to_date(
+    project_config: ProjectConfig, config_path: Union[str, Path], output_path: Union[str, Path]
+) -> bool:
+    """
+    Check whether an existing build file is newer than everything it was generated from.
+
+    The inputs are the project config, every source matched by the targets and the
+    directories each source pattern scans (so added or removed sources are noticed,
+    even when the last match of a pattern goes away). Equal timestamps count as
+    stale, since a change in the same clock tick cannot be told apart. A build file
+    written by a different generator version, i.e. without the current header, is
+    never up to date.
+    """
+    try:
+        with open(output_path, "r") as f:
+            if f.readline() != _GENERATOR_HEADER:
+                return False
+        out_mtime = os.stat(output_path).st_mtime_ns
+        if os.stat(config_path).st_mtime_ns >= out_mtime:
+            return False
+        project_root = Path(project_config.project_root)
+        for target in project_config.targets.values():
+            for source_pattern in target.get("sources", []):
+                for scanned_dir in pattern_dirs(project_root, source_pattern):
+                    if scanned_dir.stat().st_mtime_ns >= out_mtime:
+                        return False
+                for src_file in fast_glob(project_root, source_pattern):
+                    if src_file.stat().st_mtime_ns >= out_mtime:
+                        return False
+    except OSError:
+        return False
+    return True
 
 
 def generate_build_file(
@@ -254,23 +422,38 @@ def generate_build_file(
     os.makedirs(writer.module_cache_dir, exist_ok=True)
     os.makedirs(writer.targets_dir, exist_ok=True)
 
-    # Write main build file
-    with open(output_path, "w") as f:
-        f.write("ninja_required_version = 1.10\n\n")
-        # Write build variables
-        writer.write_build_vars(f)
-
-        # Write rules
-        writer.write_rules(f)
-
-        # Write build statements
-        writer.write_target_builds(f)
-        writer.write_footer(f)
+    # Render the whole build file in memory
+    data = "".join((
+        _GENERATOR_HEADER,
+        "ninja_required_version = 1.10\n\n",
+        writer._render_build_vars(),
+        _RULES_TEXT,
+        writer._render_target_builds(),
+        writer._render_footer(),
+    )).encode()
+
+    try:
+        with open(output_path, "rb") as f:
+            unchanged = f.read() == data
+    except OSError:
+        unchanged = False
+    if unchanged:
+        # keep the content, but mark it as checked against the current inputs
+        # so build_file_up_to_date() holds on the next run
+        os.utime(output_path)
+        return
+
+    # Write to a temporary file first and move it into place, so an
+    # interrupted run never leaves ninja a truncated build.ninja
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, output_path)
 
 
 if __name__ == "__main__":
     # Load project config
-    from toml_parser import load_project
+    from cuv.toml_parser import load_project_cached
 
     project_root = os.path.dirname(
         os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -278,10 +461,10 @@ if __name__ == "__main__":
     config_path = os.path.join(
         project_root, "tests", "cuv-test-project", "cxxproject.toml"
     )
-    config = load_project(config_path)
+    build_dir = os.path.join(project_root, "tests", "cuv-test-project", "build_test")
+    config = load_project_cached(config_path, build_dir)
 
     # Generate build file
-    build_dir = os.path.join(project_root, "tests", "cuv-test-project", "build_test")
     output_path = os.path.join(build_dir, "build.ninja")
     generate_build_file(config, build_dir, output_path)
     print(f"Generated build.ninja at {output_path}")
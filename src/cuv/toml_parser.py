@@ -1,10 +1,14 @@
-import toml
+import hashlib
 import os
+import pickle
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Union
+from dataclasses import MISSING, dataclass, fields
 
-@dataclass
+TOML_CACHE_FILE = ".cproject.cache.pkl"
+
+@dataclass(slots=True)
 class ProjectConfig:
     """Project configuration data class."""
     project_name: str
@@ -17,6 +21,8 @@ class ProjectConfig:
     cxx_compiler: str
     ar: str
     project_root: Path
+    config_path: Optional[Path] = None
+    use_ccache: bool = False
 
     def get_target_sources(self, target_name: str) -> List[str]:
         """Get sources for a specific target."""
@@ -35,12 +41,21 @@ def load_project(path: Union[str, Path]) -> ProjectConfig:
     if not abs_path.exists():
         raise FileNotFoundError(f"Project file not found: {path}")
     
-    config = toml.load(abs_path)
+    # imported here so that load_project_cached() hits never load the parser
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        import tomli as tomllib
+
+    with open(abs_path, "rb") as f:
+        config = tomllib.load(f)
     project_root = abs_path.parent
     
     # Parse and validate configuration
     project = config.get('project', {})
-    targets = project.get('targets', {})
+    # Copy the target tables so the cached config never shares (or pickles)
+    # the parser's objects
+    targets = {name: dict(target) for name, target in project.get('targets', {}).items()}
     toolchain = project.get('toolchain', {})
     settings = project.get('settings', {})
     
@@ -50,13 +65,74 @@ def load_project(path: Union[str, Path]) -> ProjectConfig:
         cxx_standard=settings.get('cxx_standard', '20'),
         warnings=settings.get('warnings', 'all'),
         warnings_as_errors=settings.get('warnings_as_errors', False),
+        use_ccache=settings.get('use_ccache', False),
         targets=targets,
         c_compiler=toolchain.get('C_COMPILER', ''),
         cxx_compiler=toolchain.get('CXX_COMPILER', ''),
         ar=toolchain.get('AR', ''),
-        project_root=project_root
+        project_root=project_root,
+        config_path=abs_path
     )
 
+def _stat_key(path: Union[str, Path]) -> Tuple[str, int, int]:
+    """Return the (path, mtime_ns, size) tuple identifying a config file version."""
+    abs_path = Path(path).resolve()
+    if not abs_path.exists():
+        raise FileNotFoundError(f"Project file not found: {path}")
+    st = os.stat(abs_path)
+    return (str(abs_path), st.st_mtime_ns, st.st_size)
+
+# ProjectConfig's fields as "name:type=default"; part of the cache digest so that
+# pickles written by a cuv with a different ProjectConfig layout or defaults are
+# never loaded
+_CONFIG_SCHEMA = ",".join(
+    f"{f.name}:{f.type}" + ("" if f.default is MISSING else f"={f.default!r}")
+    for f in fields(ProjectConfig)
+).encode()
+
+def _config_digest(abs_path: str) -> bytes:
+    """Hex blake2b digest of the ProjectConfig schema and a config file's path and contents."""
+    # the path is hashed too: the parsed config embeds the project root
+    key = hashlib.blake2b(_CONFIG_SCHEMA, digest_size=16)
+    key.update(b"\0")
+    key.update(abs_path.encode())
+    key.update(b"\0")
+    key.update(Path(abs_path).read_bytes())
+    return key.hexdigest().encode()
+
+@lru_cache(maxsize=None)
+def _load_project_keyed(key: Tuple[str, int, int], cache_dir: str) -> ProjectConfig:
+    """Load a project for the given stat key, going through the on-disk cache."""
+    path = key[0]
+    digest = _config_digest(path)
+    cache_file = Path(cache_dir) / TOML_CACHE_FILE
+
+    try:
+        blob = cache_file.read_bytes()
+        if blob[:len(digest)] == digest:
+            return pickle.loads(blob[len(digest):])
+    except (OSError, EOFError, ValueError, ImportError, pickle.UnpicklingError, AttributeError):
+        pass
+
+    # Miss or stale cache: re-parse and overwrite it
+    project = load_project(path)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(digest + pickle.dumps(project, protocol=pickle.HIGHEST_PROTOCOL))
+    except (OSError, pickle.PicklingError, AttributeError, TypeError):
+        pass
+    return project
+
+def load_project_cached(path: Union[str, Path], cache_dir: Union[str, Path] = "build") -> ProjectConfig:
+    """Load a project file, reusing the parsed result while its contents are unchanged.
+
+    Parsed configs are kept in memory (keyed by mtime and size) for the lifetime
+    of the process and pickled to ``cache_dir/.cproject.cache.pkl`` behind a
+    blake2b digest of the file, so later CLI runs skip TOML parsing entirely
+    even when the file was only touched.
+    """
+    return _load_project_keyed(_stat_key(path), str(cache_dir))
+
 if __name__ == "__main__":
     # Test parsing the example project
     test_project_path = Path(__file__).parent.parent.parent 
@@ -0,0 +1,44 @@
+import pytest
+
+from cuv.dep_resolver import resolve_dependencies
+
+
+def test_module_users_come_after_provider():
+    json_deps = {"rules": [
+        {"primary-output": "objects/main.o", "requires": [{"logical-name": "hello"}]},
+        {"primary-output": "module_cache/hello.pcm", "provides": [{"logical-name": "hello"}]},
+    ]}
+
+    task_list = resolve_dependencies(json_deps)
+
+    assert task_list == [
+        ("module_cache/hello.pcm", []),
+        ("objects/main.o", ["module_cache/hello.pcm"]),
+    ]
+
+
+def test_std_modules_need_no_provider():
+    json_deps = {"rules": [
+        {"primary-output": "objects/main.o", "requires": [{"logical-name": "std"}]},
+    ]}
+
+    assert resolve_dependencies(json_deps) == [("objects/main.o", [])]
+
+
+def test_unprovided_module_raises():
+    json_deps = {"rules": [
+        {"primary-output": "objects/main.o", "requires": [{"logical-name": "missing"}]},
+    ]}
+
+    with pytest.raises(RuntimeError, match="missing"):
+        resolve_dependencies(json_deps)
+
+
+def test_cycle_raises():
+    json_deps = {"rules": [
+        {"primary-output": "a.pcm", "provides": [{"logical-name": "a"}], "requires": [{"logical-name": "b"}]},
+        {"primary-output": "b.pcm", "provides": [{"logical-name": "b"}], "requires": [{"logical-name": "a"}]},
+    ]}
+
+    with pytest.raises(RuntimeError, match="cycle"):
+        resolve_dependencies(json_deps)
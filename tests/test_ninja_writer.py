@@ -0,0 +1,161 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from cuv import ninja_writer
+from cuv.ninja_writer import NinjaWriter, build_file_up_to_date, generate_build_file
+from cuv.toml_parser import load_project
+
+CXXPROJECT_TOML = """\
+[project]
+name = "demo"
+version = "0.1.0"
+
+[project.targets]
+demo = {{ type = "executable", sources = [{sources}] }}
+
+[project.toolchain]
+C_COMPILER = "clang"
+CXX_COMPILER = "clang++"
+AR = "ar"
+"""
+
+# well before anything the tests write, so generated files are always newer
+OLD_MTIME_NS = 1_000_000_000 * 10**9
+
+
+def make_project(root: Path, sources=('"src/*.cpp"', '"interface/*.cppm"')) -> Path:
+    """Write a small modules project under root and return its config path."""
+    (root / "src").mkdir()
+    (root / "interface").mkdir()
+    (root / "src" / "main.cpp").write_text("import hello;\nint main() { say_hello(); }\n")
+    (root / "src" / "hello.cpp").write_text("module hello;\nvoid say_hello() {}\n")
+    (root / "interface" / "hello.cppm").write_text("export module hello;\nexport void say_hello();\n")
+    config_path = root / "cxxproject.toml"
+    config_path.write_text(CXXPROJECT_TOML.format(sources=", ".join(sources)))
+    return config_path
+
+
+def age_project(root: Path) -> None:
+    """Backdate the config, sources and source directories (not the build dir)."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        if "build" in dirnames:
+            dirnames.remove("build")
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+        os.utime(dirpath, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+
+
+@pytest.fixture
+def scan_calls(monkeypatch):
+    """Replace clang-scan-deps with a stub that reports no module dependencies."""
+    calls = []
+
+    def fake_run(cmd, cwd, check):
+        calls.append(cmd)
+        with open(os.path.join(cwd, "compile_commands.json")) as f:
+            entries = json.load(f)
+        rules = [{"primary-output": entry["output"]} for entry in entries]
+        with open(os.path.join(cwd, "deps.json"), "w") as f:
+            json.dump({"revision": 0, "rules": rules, "version": 1}, f)
+
+    monkeypatch.setattr(ninja_writer.subprocess, "run", fake_run)
+    return calls
+
+
+def generate(config_path: Path):
+    build_dir = config_path.parent / "build"
+    build_file = build_dir / "build.ninja"
+    project = load_project(config_path)
+    generate_build_file(project, str(build_dir), str(build_file))
+    return project, build_file
+
+
+def test_build_file_up_to_date_after_generation(tmp_path, scan_calls):
+    config_path = make_project(tmp_path)
+    project, build_file = generate(config_path)
+    age_project(tmp_path)
+
+    assert build_file_up_to_date(project, config_path, build_file)
+
+
+def test_new_source_invalidates_build_file(tmp_path, scan_calls):
+    config_path = make_project(tmp_path)
+    project, build_file = generate(config_path)
+    age_project(tmp_path)
+
+    (tmp_path / "src" / "util.cpp").write_text("int util() { return 1; }\n")
+
+    assert not build_file_up_to_date(project, config_path, build_file)
+
+
+def test_removed_last_match_invalidates_build_file(tmp_path, scan_calls):
+    config_path = make_project(tmp_path, sources=('"src/*.cpp"', '"extra/*.cpp"', '"interface/*.cppm"'))
+    (tmp_path / "extra").mkdir()
+    (tmp_path / "extra" / "util.cpp").write_text("int util() { return 1; }\n")
+    project, build_file = generate(config_path)
+    age_project(tmp_path)
+
+    (tmp_path / "extra" / "util.cpp").unlink()
+
+    assert not build_file_up_to_date(project, config_path, build_file)
+
+
+def test_touched_config_invalidates_build_file(tmp_path, scan_calls):
+    config_path = make_project(tmp_path)
+    project, build_file = generate(config_path)
+    age_project(tmp_path)
+
+    os.utime(config_path)
+
+    assert not build_file_up_to_date(project, config_path, build_file)
+
+
+def test_build_file_from_other_generator_is_stale(tmp_path, scan_calls):
+    config_path = make_project(tmp_path)
+    project, build_file = generate(config_path)
+    build_file.write_text(build_file.read_text().split("\n", 1)[1])
+    age_project(tmp_path)
+
+    assert not build_file_up_to_date(project, config_path, build_file)
+
+
+def test_duplicate_pattern_match_is_linked_once(tmp_path):
+    config_path = make_project(tmp_path, sources=('"src/*.cpp"', '"src/main.cpp"', '"interface/*.cppm"'))
+    writer = NinjaWriter(load_project(config_path), tmp_path / "build")
+
+    _, targets = writer._registered_tasks
+
+    (link_task,) = targets
+    assert sorted(link_task.input) == sorted([os.path.join("objects", "hello.o"), os.path.join("objects", "main.o")])
+
+
+def test_scan_deps_reused_until_a_source_changes(tmp_path, scan_calls):
+    config_path = make_project(tmp_path)
+    generate(config_path)
+    generate(config_path)
+    assert len(scan_calls) == 1
+
+    main_cpp = tmp_path / "src" / "main.cpp"
+    main_cpp.write_text(main_cpp.read_text() + "// edited\n")
+    generate(config_path)
+    assert len(scan_calls) == 2
+
+
+def test_compile_commands_kept_while_inputs_unchanged(tmp_path, scan_calls):
+    config_path = make_project(tmp_path)
+    generate(config_path)
+    compile_commands = tmp_path / "build" / "compile_commands.json"
+    inode = compile_commands.stat().st_ino
+
+    generate(config_path)
+    assert compile_commands.stat().st_ino == inode
+
+    (tmp_path / "src" / "util.cpp").write_text("int util() { return 1; }\n")
+    generate(config_path)
+    assert "util.cpp" in compile_commands.read_text()
+    assert sorted(os.listdir(tmp_path / "build" / "rsp")) == [
+        "hello.o.rsp", "hello.pcm.rsp", "main.o.rsp", "util.o.rsp",
+    ]
@@ -0,0 +1,65 @@
+import os
+import pickle
+
+import pytest
+
+from cuv import toml_parser
+from cuv.toml_parser import TOML_CACHE_FILE, load_project, load_project_cached
+
+CXXPROJECT_TOML = """\
+[project]
+name = "{name}"
+version = "0.1.0"
+
+[project.targets]
+{name} = {{ type = "executable", sources = ["src/*.cpp"] }}
+
+[project.toolchain]
+CXX_COMPILER = "clang++"
+"""
+
+
+@pytest.fixture(autouse=True)
+def clear_memo():
+    toml_parser._load_project_keyed.cache_clear()
+    yield
+    toml_parser._load_project_keyed.cache_clear()
+
+
+def test_cached_load_matches_parse(tmp_path):
+    config_path = tmp_path / "cxxproject.toml"
+    config_path.write_text(CXXPROJECT_TOML.format(name="demo"))
+
+    project = load_project_cached(config_path, tmp_path / "build")
+
+    assert project == load_project(config_path)
+    assert (tmp_path / "build" / TOML_CACHE_FILE).exists()
+
+
+def test_changed_content_with_same_mtime_is_reparsed(tmp_path):
+    config_path = tmp_path / "cxxproject.toml"
+    config_path.write_text(CXXPROJECT_TOML.format(name="demo"))
+    st = config_path.stat()
+    load_project_cached(config_path, tmp_path / "build")
+    toml_parser._load_project_keyed.cache_clear()
+
+    config_path.write_text(CXXPROJECT_TOML.format(name="other"))
+    os.utime(config_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert load_project_cached(config_path, tmp_path / "build").project_name == "other"
+
+
+def test_cache_from_other_schema_is_ignored(tmp_path, monkeypatch):
+    config_path = tmp_path / "cxxproject.toml"
+    config_path.write_text(CXXPROJECT_TOML.format(name="demo"))
+    cache_file = tmp_path / "build" / TOML_CACHE_FILE
+
+    # a cache written by a cuv whose ProjectConfig looked different
+    monkeypatch.setattr(toml_parser, "_CONFIG_SCHEMA", b"project_name:str")
+    load_project_cached(config_path, tmp_path / "build")
+    digest = toml_parser._config_digest(str(config_path.resolve()))
+    cache_file.write_bytes(digest + pickle.dumps("not a ProjectConfig"))
+    monkeypatch.undo()
+    toml_parser._load_project_keyed.cache_clear()
+
+    assert load_project_cached(config_path, tmp_path / "build") == load_project(config_path)